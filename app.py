@@ -9,9 +9,12 @@ Provides a web interface to manage registered license plates:
 - View entry/exit logs
 """
 
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+from flask import Flask, render_template, request, redirect, url_for, flash, session, g, make_response
 import sqlite3
+import hashlib
 import os
+import queue
+import time
 import logging
 import functools
 from datetime import datetime
@@ -28,13 +31,106 @@ logging.basicConfig(
 
 # Configuration
 db_path = "car_park.db"
+DB_POOL_SIZE = 8
+PLATE_COUNT_TTL = 30  # Seconds a cached dashboard plate count stays valid
 app = Flask(__name__)
 app.secret_key = os.urandom(24)  # For flash messages and session
 
+# Idle database connections, reused across requests
+_db_pool = queue.Queue(maxsize=DB_POOL_SIZE)
+
+# Cached plate count as (count, expiry time)
+_plate_count_cache = {}
+
 # Default admin credentials - in a real system, use a more secure approach
 ADMIN_USERNAME = "admin"
 ADMIN_PASSWORD = "admin"
 
+def _new_connection():
+    """Open a database connection configured for reuse across requests"""
+    # sqlite3 keeps compiled statements per connection, keyed by SQL text.
+    # Since pooled connections outlive requests, each route's queries are only
+    # parsed and planned once per connection. The default cache of 128
+    # statements holds every query this app issues.
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def get_conn():
+    """Get the database connection for the current request
+    
+    The connection is taken from the pool on first use and stored in `g`,
+    so every query in a request shares it.
+    """
+    if "conn" not in g:
+        try:
+            g.conn = _db_pool.get_nowait()
+        except queue.Empty:
+            g.conn = _new_connection()
+    return g.conn
+
+
+@app.teardown_appcontext
+def release_conn(exception):
+    """Return the request's database connection to the pool"""
+    conn = g.pop("conn", None)
+    if conn is None:
+        return
+    
+    # Never hand an open transaction to the next request
+    if conn.in_transaction:
+        conn.rollback()
+    
+    try:
+        _db_pool.put_nowait(conn)
+    except queue.Full:
+        conn.close()
+
+
+def get_cached_plate_count():
+    """Get the cached plate count, or None if missing or expired"""
+    entry = _plate_count_cache.get("count")
+    if entry and entry[1] > time.monotonic():
+        return entry[0]
+    return None
+
+
+def cache_plate_count(count):
+    """Cache the plate count for PLATE_COUNT_TTL seconds"""
+    _plate_count_cache["count"] = (count, time.monotonic() + PLATE_COUNT_TTL)
+
+
+def invalidate_plate_count():
+    """Drop the cached plate count after the plates table changes"""
+    _plate_count_cache.pop("count", None)
+
+
+def make_etag(state):
+    """Build an ETag from a row summarising a table's current contents"""
+    return hashlib.md5(repr(tuple(state)).encode()).hexdigest()
+
+
+def tag_response(response, etag):
+    """Attach the ETag and make the browser revalidate before reusing the page"""
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def check_not_modified(etag):
+    """Return a 304 response if the client's cached page is current, otherwise None
+    
+    Pages with pending flash messages are always rendered so the message is shown.
+    """
+    if "_flashes" in session or not request.if_none_match.contains(etag):
+        return None
+    return tag_response(make_response("", 304), etag)
+
+
 # Add context processor to provide 'now' to all templates
 @app.context_processor
 def inject_now():
@@ -90,24 +186,40 @@ def logout():
 def dashboard():
     """Main dashboard showing system status"""
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = get_conn()
         cursor = conn.cursor()
         
-        # Get total registered plates
-        cursor.execute("SELECT COUNT(*) as count FROM plates")
-        plate_count = cursor.fetchone()["count"]
-        
-        # Get recent entries
-        cursor.execute("""
-            SELECT plate_number, action, timestamp 
-            FROM movement_log 
-            ORDER BY timestamp DESC 
-            LIMIT 5
-        """)
-        recent_activity = cursor.fetchall()
+        plate_count = get_cached_plate_count()
         
-        conn.close()
+        if plate_count is None:
+            # Get total registered plates and recent entries in one query.
+            # The LEFT JOIN still yields a single row (with NULL log columns)
+            # when the log is empty, so the count is always available.
+            cursor.execute("""
+                SELECT p.count, m.plate_number, m.action, m.timestamp
+                FROM (SELECT COUNT(*) AS count FROM plates) AS p
+                LEFT JOIN (
+                    SELECT plate_number, action, timestamp
+                    FROM movement_log
+                    ORDER BY timestamp DESC
+                    LIMIT 5
+                ) AS m ON 1
+                ORDER BY m.timestamp DESC
+            """)
+            rows = cursor.fetchall()
+            
+            plate_count = rows[0]["count"]
+            cache_plate_count(plate_count)
+            recent_activity = [row for row in rows if row["plate_number"] is not None]
+        else:
+            # Count is cached, only get recent entries
+            cursor.execute("""
+                SELECT plate_number, action, timestamp
+                FROM movement_log
+                ORDER BY timestamp DESC
+                LIMIT 5
+            """)
+            recent_activity = cursor.fetchall()
         
         return render_template(
             "dashboard.html", 
@@ -126,16 +238,21 @@ def dashboard():
 def list_plates():
     """List all registered license plates"""
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = get_conn()
         cursor = conn.cursor()
         
+        # Skip the listing and render if the client already has this version.
+        # COUNT and MAX(id) change on every insert and delete.
+        cursor.execute("SELECT COUNT(*), MAX(id), MAX(added_date) FROM plates")
+        etag = make_etag(cursor.fetchone())
+        not_modified = check_not_modified(etag)
+        if not_modified:
+            return not_modified
+        
         cursor.execute("SELECT id, plate_number, added_date FROM plates ORDER BY added_date DESC")
         plates = cursor.fetchall()
         
-        conn.close()
-        
-        return render_template("plates.html", plates=plates)
+        return tag_response(make_response(render_template("plates.html", plates=plates)), etag)
     
     except Exception as e:
         logging.error(f"Error listing plates: {str(e)}")
@@ -155,14 +272,13 @@ def add_plate():
             return redirect(url_for("add_plate"))
         
         try:
-            conn = sqlite3.connect(db_path)
+            conn = get_conn()
             cursor = conn.cursor()
             
             # Check if plate already exists
             cursor.execute("SELECT 1 FROM plates WHERE plate_number = ?", (plate_number,))
             if cursor.fetchone():
                 flash(f"License plate {plate_number} is already registered", "warning")
-                conn.close()
                 return redirect(url_for("list_plates"))
             
             # Add new plate
@@ -172,7 +288,7 @@ def add_plate():
             )
             
             conn.commit()
-            conn.close()
+            invalidate_plate_count()
             
             flash(f"License plate {plate_number} added successfully", "success")
             return redirect(url_for("list_plates"))
@@ -190,26 +306,23 @@ def add_plate():
 def remove_plate(plate_id):
     """Remove a license plate from the system"""
     try:
-        conn = sqlite3.connect(db_path)
+        conn = get_conn()
         cursor = conn.cursor()
         
-        # Get the plate number for the confirmation message
-        cursor.execute("SELECT plate_number FROM plates WHERE id = ?", (plate_id,))
+        # Delete the plate, getting its number for the confirmation message
+        # (RETURNING needs SQLite 3.35+)
+        cursor.execute("DELETE FROM plates WHERE id = ? RETURNING plate_number", (plate_id,))
         result = cursor.fetchone()
+        conn.commit()
         
         if result:
             plate_number = result[0]
-            
-            # Delete the plate
-            cursor.execute("DELETE FROM plates WHERE id = ?", (plate_id,))
-            conn.commit()
+            invalidate_plate_count()
             
             flash(f"License plate {plate_number} removed successfully", "success")
         else:
             flash("License plate not found", "danger")
         
-        conn.close()
-        
     except Exception as e:
         logging.error(f"Error removing plate: {str(e)}")
         flash("Error removing license plate", "danger")
@@ -222,10 +335,18 @@ def remove_plate(plate_id):
 def view_logs():
     """View vehicle movement logs"""
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = get_conn()
         cursor = conn.cursor()
         
+        # Skip the query and render if no movement was logged since the client's copy.
+        # Log rows are never deleted, so the AUTOINCREMENT id alone tracks changes
+        # and avoids a COUNT(*) scan of the whole log.
+        cursor.execute("SELECT MAX(id) FROM movement_log")
+        etag = make_etag(cursor.fetchone())
+        not_modified = check_not_modified(etag)
+        if not_modified:
+            return not_modified
+        
         cursor.execute("""
             SELECT id, plate_number, action, timestamp 
             FROM movement_log 
@@ -234,9 +355,7 @@ def view_logs():
         """)
         logs = cursor.fetchall()
         
-        conn.close()
-        
-        return render_template("logs.html", logs=logs)
+        return tag_response(make_response(render_template("logs.html", logs=logs)), etag)
     
     except Exception as e:
         logging.error(f"Error viewing logs: {str(e)}")
@@ -290,5 +409,23 @@ if __name__ == "__main__":
         except Exception as e:
             logging.error(f"Failed to initialize database: {str(e)}")
     
+    # Ensure indexes exist, including on databases created before they were added.
+    # plate_number lookups on plates already use its UNIQUE index.
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_log_ts ON movement_log(timestamp DESC)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_log_plate ON movement_log(plate_number)")
+        
+        # Refresh planner statistics so the new indexes get picked
+        cursor.execute("ANALYZE")
+        
+        conn.commit()
+        conn.close()
+        
+    except Exception as e:
+        logging.error(f"Failed to create database indexes: {str(e)}")
+    
     # Run the Flask application
     app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
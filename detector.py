@@ -1,30 +1,95 @@
+import os
+# Thread limits must be in place before torch spins up its OpenMP pool
+if os.environ.get('TORCH_NUM_THREADS'):
+    os.environ.setdefault('OMP_NUM_THREADS',os.environ['TORCH_NUM_THREADS'])
+# Silence Ultralytics' startup and per-call logging
+os.environ.setdefault('YOLO_VERBOSE','False')
 import cv2,torch,numpy as np
 from ultralytics import YOLO
-import logging,time,os
+import logging,time,functools
 logger=logging.getLogger(__name__)
 os.environ['CUDA_VISIBLE_DEVICES']='-1'
+if os.environ.get('TORCH_NUM_THREADS'):
+    torch.set_num_threads(int(os.environ['TORCH_NUM_THREADS']))
+# Inference only: never record autograd state
+torch.set_grad_enabled(False)
+
+# Large JPEGs are decoded at 1/2, 1/4 or 1/8 scale as long as the long side stays at or above this
+DECODE_TARGET_SIZE=1280
+REDUCED_DECODE_FLAGS=((8,cv2.IMREAD_REDUCED_COLOR_8),(4,cv2.IMREAD_REDUCED_COLOR_4),(2,cv2.IMREAD_REDUCED_COLOR_2))
+
+# Read (height,width) from the first JPEG frame header without decoding, None if not found
+def _jpeg_size(data):
+    i,n=2,len(data)
+    while i+9<n:
+        if data[i]!=0xFF:
+            return None
+        marker=data[i+1]
+        if marker==0xFF:
+            i+=1
+            continue
+        if marker==0x01 or 0xD0<=marker<=0xD8:
+            i+=2
+            continue
+        if 0xC0<=marker<=0xCF and marker not in (0xC4,0xC8,0xCC):
+            return int.from_bytes(data[i+5:i+7],'big'),int.from_bytes(data[i+7:i+9],'big')
+        i+=2+int.from_bytes(data[i+2:i+4],'big')
+    return None
+
+# DETECTOR_MODEL if set (e.g. best.int8.onnx once validated), otherwise best.pt
+def default_model_path(model_path="best.pt"):
+    return os.environ.get('DETECTOR_MODEL') or model_path
+
+# Load and fuse the model once per process; later detectors reuse it.
+# Exported models (e.g. best.int8.onnx from export_model.py) run on their own runtime as-is
+@functools.lru_cache(maxsize=1)
+def _get_model(model_path,device):
+    if not model_path.endswith('.pt'):
+        return YOLO(model_path,task='detect')
+    model=YOLO(model_path).to(device)
+    model.fuse()
+    return model
 
 class LicensePlateDetector:
-    def __init__(self,model_path="best.pt",conf_threshold=0.3):
+    def __init__(self,model_path="best.pt",conf_threshold=0.3,imgsz=640):
         self.conf_threshold=conf_threshold
+        # Must match the size an exported model was built with
+        self.imgsz=imgsz
         try:
             self.device='cuda' if torch.cuda.is_available() else 'cpu'
             logger.info(f"Initializing YOLOv8 detector with model: {model_path} on device: {self.device}")
-            self.model=YOLO(model_path).to(self.device)
-            self.model.fuse()
+            self.model=_get_model(model_path,self.device)
             logger.info(f"YOLOv8 model loaded and fused successfully")
         except Exception as e:
             logger.error(f"Failed to load YOLOv8 model: {str(e)}")
             raise
     
+    def decode_image(self,image_bytes):
+        # Convert bytes to numpy array
+        nparr=np.frombuffer(image_bytes,np.uint8)
+        image=cv2.imdecode(nparr,self._decode_flag(image_bytes))
+        if image is None:
+            logger.error("Failed to decode image")
+        return image
+    
+    def _decode_flag(self,image_bytes):
+        # YOLO downsamples to 640 anyway, so let libjpeg skip detail we would throw away
+        if not isinstance(image_bytes,(bytes,bytearray)) or not image_bytes.startswith(b'\xff\xd8'):
+            return cv2.IMREAD_COLOR
+        size=_jpeg_size(image_bytes)
+        if size is None:
+            return cv2.IMREAD_COLOR
+        for factor,flag in REDUCED_DECODE_FLAGS:
+            if max(size)>=DECODE_TARGET_SIZE*factor:
+                logger.info(f"Decoding {size[1]}x{size[0]} JPEG at 1/{factor} scale")
+                return flag
+        return cv2.IMREAD_COLOR
+    
     def detect_and_crop(self,image_bytes):
         try:
-            # Convert bytes to numpy array
-            nparr=np.frombuffer(image_bytes,np.uint8)
-            image=cv2.imdecode(nparr,cv2.IMREAD_COLOR)
+            image=self.decode_image(image_bytes)
             
             if image is None:
-                logger.error("Failed to decode image")
                 return None
             
             # Perform detection and return the cropped plate
@@ -34,19 +99,47 @@ class LicensePlateDetector:
             logger.error(f"Error in license plate detection: {str(e)}")
             return None
             
-    def detect_plate(self,image):
+    def detect_plate(self,image,source=None):
+        # With source, detect on the (smaller) image but crop from the full-resolution source
+        if source is None:
+            return self.detect_plates([image])[0]
+        return self.detect_plates([image],[source])[0]
+    
+    def detect_plates(self,images,sources=None):
+        # Run one forward pass over the whole batch, one crop (or None) per image
         try:
-            logger.info(f"Running license plate detection on image of shape: {image.shape}")
-            results=self.model(image,conf=self.conf_threshold,iou=0.5,max_det=1,verbose=False)
+            logger.info(f"Running license plate detection on batch of {len(images)} image(s)")
+            with torch.inference_mode():
+                results=self.model(images,conf=self.conf_threshold,iou=0.5,max_det=1,imgsz=self.imgsz,verbose=False)
             
-            if not results or len(results[0].boxes) == 0:
+            if not results:
+                logger.warning("No license plates detected by YOLOv8")
+                return [None]*len(images)
+            
+            sources=sources or images
+            return [self._crop_plate(image,result,source) for image,result,source in zip(images,results,sources)]
+            
+        except Exception as e:
+            logger.error(f"Error in license plate detection: {str(e)}")
+            return [None]*len(images)
+    
+    def _crop_plate(self,image,result,source):
+        try:
+            logger.info(f"Cropping license plate from image of shape: {source.shape}")
+            
+            if len(result.boxes) == 0:
                 logger.warning("No license plates detected by YOLOv8")
                 return None
                 
             # Get the first (and assumed best) detection
-            box = results[0].boxes[0]
+            box = result.boxes[0]
             conf = float(box.conf[0])
-            x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
+            x1, y1, x2, y2 = box.xyxy[0].tolist()
+            
+            # Map the box from the detection image onto the source image
+            scale_y, scale_x = source.shape[0]/image.shape[0], source.shape[1]/image.shape[1]
+            x1, y1, x2, y2 = int(x1*scale_x), int(y1*scale_y), int(x2*scale_x), int(y2*scale_y)
+            image = source
             
             logger.info(f"Detected license plate with confidence {conf:.2f} at coordinates: ({x1},{y1}) to ({x2},{y2})")
             
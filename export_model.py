@@ -0,0 +1,207 @@
+#!/usr/bin/python3
+"""
+Smart Car Park System - Detector Model Export
+
+Exports the YOLOv8 plate detector (best.pt) for faster CPU inference:
+    python3 export_model.py                -> best.onnx, best.int8.onnx
+    python3 export_model.py --calibration plate_images/
+                                           -> best.int8.onnx, statically quantized
+                                              (weights and activations) from ~200 sample images
+    python3 export_model.py --format ncnn  -> best_ncnn_model/ (FP16, fastest on Raspberry Pi)
+
+Select the exported model with DETECTOR_MODEL, e.g. DETECTOR_MODEL=best_ncnn_model.
+"""
+
+import argparse
+import glob
+import logging
+import os
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def export_onnx(model_path, imgsz=640):
+    """Export a YOLO model to ONNX
+    
+    Args:
+        model_path (str): Path to the PyTorch model
+        imgsz (int): Input image size
+    
+    Returns:
+        str: Path to the exported ONNX model
+    """
+    onnx_path = YOLO(model_path).export(format="onnx", opset=13, dynamic=True, imgsz=imgsz)
+    logging.info(f"Exported {model_path} to {onnx_path}")
+    return onnx_path
+
+
+def letterbox(image, imgsz=640):
+    """Prepare an image the way YOLO does: letterbox, RGB, NCHW float in [0, 1]
+    
+    Args:
+        image (numpy.ndarray): BGR image
+        imgsz (int): Model input size
+    
+    Returns:
+        numpy.ndarray: Array of shape (1, 3, imgsz, imgsz)
+    """
+    h, w = image.shape[:2]
+    scale = imgsz / max(h, w)
+    resized = cv2.resize(image, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_LINEAR)
+    
+    canvas = np.full((imgsz, imgsz, 3), 114, np.uint8)
+    top = (imgsz - resized.shape[0]) // 2
+    left = (imgsz - resized.shape[1]) // 2
+    canvas[top:top + resized.shape[0], left:left + resized.shape[1]] = resized
+    
+    blob = canvas[:, :, ::-1].transpose(2, 0, 1)[np.newaxis].astype(np.float32) / 255.0
+    return np.ascontiguousarray(blob)
+
+
+class ImageCalibrationReader:
+    """Feeds sample images to onnxruntime's static quantization calibration"""
+    
+    def __init__(self, image_dir, input_name, imgsz=640):
+        """Collect calibration images from a directory"""
+        self.paths = sorted(
+            path for pattern in ("*.jpg", "*.jpeg", "*.png")
+            for path in glob.glob(os.path.join(image_dir, pattern))
+        )
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self.index = 0
+        logging.info(f"Calibrating with {len(self.paths)} images from {image_dir}")
+    
+    def get_next(self):
+        """Return the next model input, or None when all images are used"""
+        while self.index < len(self.paths):
+            image = cv2.imread(self.paths[self.index])
+            self.index += 1
+            if image is not None:
+                return {self.input_name: letterbox(image, self.imgsz)}
+        return None
+
+
+def quantize_int8(onnx_path, calibration_dir=None, imgsz=640):
+    """Quantize an ONNX model to int8
+    
+    Without calibration images the convolutions are quantized dynamically
+    with uint8 weights; onnxruntime's CPU provider only has a ConvInteger
+    kernel for uint8 activations with uint8 weights. With calibration images,
+    activations are quantized statically too (QDQ, per channel), which lets
+    int8 dot product instructions run the convolutions. Either way the result
+    must contain quantized nodes and is loaded and run once before it is kept.
+    
+    Args:
+        onnx_path (str): Path to the float ONNX model
+        calibration_dir (str): Directory of sample images, or None
+        imgsz (int): Model input size
+    
+    Returns:
+        str: Path to the quantized model
+    """
+    from onnxruntime import InferenceSession
+    from onnxruntime.quantization import quantize_dynamic, quantize_static, QuantFormat, QuantType
+    
+    int8_path = f"{os.path.splitext(onnx_path)[0]}.int8.onnx"
+    if calibration_dir:
+        input_name = InferenceSession(onnx_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+        quantize_static(
+            onnx_path, int8_path,
+            ImageCalibrationReader(calibration_dir, input_name, imgsz),
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            weight_type=QuantType.QInt8
+        )
+    else:
+        quantize_dynamic(
+            onnx_path, int8_path,
+            op_types_to_quantize=["Conv"],
+            weight_type=QuantType.QUInt8
+        )
+    
+    try:
+        check_quantized(int8_path)
+        check_model(int8_path, imgsz)
+    except Exception:
+        os.remove(int8_path)
+        raise
+    logging.info(f"Quantized {onnx_path} to {int8_path}")
+    return int8_path
+
+
+def check_quantized(onnx_path):
+    """Make sure an ONNX model actually contains quantized operators
+    
+    Args:
+        onnx_path (str): Path to the ONNX model
+    
+    Raises:
+        RuntimeError: If quantization left the model fully float
+    """
+    import onnx
+    
+    op_types = {node.op_type for node in onnx.load(onnx_path).graph.node}
+    quantized = op_types & {"ConvInteger", "MatMulInteger", "QLinearConv", "DequantizeLinear"}
+    if not quantized:
+        raise RuntimeError(f"No operators were quantized in {onnx_path}")
+    logging.info(f"Quantized operators in {onnx_path}: {', '.join(sorted(quantized))}")
+
+
+def check_model(onnx_path, imgsz=640):
+    """Load an ONNX model and run one inference on a blank image
+    
+    Catches models onnxruntime can't execute at export time, instead of on
+    the first detection.
+    
+    Args:
+        onnx_path (str): Path to the ONNX model
+        imgsz (int): Model input size
+    """
+    from onnxruntime import InferenceSession
+    
+    session = InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+    blank = np.zeros((1, 3, imgsz, imgsz), np.float32)
+    session.run(None, {session.get_inputs()[0].name: blank})
+
+
+def export_ncnn(model_path, imgsz=640):
+    """Export a YOLO model to NCNN with FP16 weights
+    
+    Args:
+        model_path (str): Path to the PyTorch model
+        imgsz (int): Input image size; smaller sizes suit a fixed close-range camera
+    
+    Returns:
+        str: Path to the exported NCNN model directory
+    """
+    ncnn_path = YOLO(model_path).export(format="ncnn", half=True, imgsz=imgsz)
+    logging.info(f"Exported {model_path} to {ncnn_path}")
+    return ncnn_path
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Export the license plate detector for CPU inference")
+    parser.add_argument("--model", default="best.pt", help="PyTorch model to export")
+    parser.add_argument("--format", choices=["onnx", "ncnn"], default="onnx",
+                        help="onnx: int8-quantized ONNX, ncnn: FP16 NCNN")
+    parser.add_argument("--imgsz", type=int, default=640, help="Input image size")
+    parser.add_argument("--calibration", help="Sample image directory for static int8 quantization (onnx only)")
+    args = parser.parse_args()
+    
+    if args.format == "ncnn":
+        export_ncnn(args.model, args.imgsz)
+    else:
+        quantize_int8(export_onnx(args.model, args.imgsz), args.calibration, args.imgsz)
+
+
+if __name__ == "__main__":
+    main()
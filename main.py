@@ -1,21 +1,79 @@
-import os,logging
+import os,logging,asyncio,contextlib
+# One torch thread per worker when several uvicorn workers share the cores; a single worker keeps torch's default
+if int(os.environ.get('WEB_CONCURRENCY','1'))>1:
+    os.environ.setdefault('TORCH_NUM_THREADS','1')
 from fastapi import FastAPI,File,UploadFile,HTTPException
 from fastapi.responses import JSONResponse
 import uvicorn
-from detector import LicensePlateDetector
-from ocr_reader import OCRReader
+from detector import LicensePlateDetector,default_model_path
+from ocr_reader import OCRReader,clean_plate_text
 logging.basicConfig(level=logging.INFO,format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger=logging.getLogger(__name__)
-app=FastAPI(title="License Plate Recognition API",description="API for detecting and recognizing license plates from images",version="1.0.0")
-detector=LicensePlateDetector(model_path="best.pt")
+BATCH_MAX_SIZE=8
+BATCH_WINDOW=0.01
+MAX_UPLOAD_BYTES=int(os.environ.get('MAX_UPLOAD_BYTES',5*1024*1024))
+# JPEG, PNG, BMP and RIFF (WebP) magic bytes
+IMAGE_SIGNATURES=(b'\xff\xd8\xff',b'\x89PNG',b'BM',b'RIFF')
+detector=LicensePlateDetector(model_path=default_model_path(),imgsz=int(os.environ.get("DETECTOR_IMGSZ",640)))
 ocr=OCRReader()
+detect_queue=None
+async def batch_detect_worker():
+    # Collect requests for up to BATCH_WINDOW seconds and run them through YOLO in one pass
+    loop=asyncio.get_running_loop()
+    while True:
+        batch=[await detect_queue.get()]
+        deadline=loop.time()+BATCH_WINDOW
+        while len(batch)<BATCH_MAX_SIZE:
+            timeout=deadline-loop.time()
+            if timeout<=0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(detect_queue.get(),timeout))
+            except asyncio.TimeoutError:
+                break
+        images=[image for image,_ in batch]
+        try:
+            crops=await asyncio.to_thread(detector.detect_plates,images)
+        except Exception as e:
+            # Fail this batch's requests but keep the worker alive for later ones
+            for _,future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+        if len(crops)!=len(batch):
+            logger.warning(f"Detector returned {len(crops)} results for a batch of {len(batch)}")
+        # Requests without a result get None rather than waiting forever
+        crops=list(crops)[:len(batch)]+[None]*(len(batch)-len(crops))
+        for (_,future),crop in zip(batch,crops):
+            if not future.done():
+                future.set_result(crop)
+async def detect_batched(image):
+    future=asyncio.get_running_loop().create_future()
+    await detect_queue.put((image,future))
+    return await future
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    global detect_queue
+    detect_queue=asyncio.Queue()
+    worker=asyncio.create_task(batch_detect_worker())
+    yield
+    worker.cancel()
+app=FastAPI(title="License Plate Recognition API",description="API for detecting and recognizing license plates from images",version="1.0.0",lifespan=lifespan)
 @app.post("/lpr")
 async def recognize_license_plate(file:UploadFile=File(...)):
     try:
         if not file.content_type.startswith("image/"):
             raise HTTPException(status_code=400,detail="File is not an image")
-        contents=await file.read()
-        cropped_plate=detector.detect_and_crop(contents)
+        # Check the magic bytes before pulling in the rest of the upload
+        header=await file.read(12)
+        if not header.startswith(IMAGE_SIGNATURES) or (header.startswith(b'RIFF') and header[8:12]!=b'WEBP'):
+            raise HTTPException(status_code=400,detail="File is not an image")
+        # Read at most one byte past the limit so oversized uploads are never fully buffered
+        contents=header+await file.read(MAX_UPLOAD_BYTES-len(header)+1)
+        if len(contents)>MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413,detail="Image is too large")
+        image=detector.decode_image(contents)
+        cropped_plate=await detect_batched(image) if image is not None else None
         # write the cropped plate to a file for debugging
         if cropped_plate is None:
             return JSONResponse(status_code=200,content={"error":"License plate not detected or unreadable"})
@@ -23,8 +81,10 @@ async def recognize_license_plate(file:UploadFile=File(...)):
         print("plate_text",plate_text)
         if not plate_text:
             return JSONResponse(status_code=200,content={"error":"License plate not detected or unreadable"})
-        plate_text=''.join(ch for ch in plate_text if ch.isalnum()).upper()
+        plate_text=clean_plate_text(plate_text)
         return {"plate_text":plate_text}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing request: {str(e)}")
         return JSONResponse(status_code=500,content={"error":"Error processing the image"})
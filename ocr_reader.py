@@ -1,12 +1,30 @@
-import logging,cv2,numpy as np,os,re
+import logging,cv2,numpy as np,os,re,hashlib
+from collections import OrderedDict
 from paddleocr import PaddleOCR
 logger=logging.getLogger(__name__)
 os.environ['CUDA_VISIBLE_DEVICES']='-1'
+# Below this confidence the raw image is OCR'd as well as the preprocessed one
+FALLBACK_CONFIDENCE=0.7
+PLATE_PATTERN=re.compile(r'^(\d{2}[A-Za-z][0-9]{4,5})$')
+VALID_PLATE_PATTERNS=[re.compile(r'^\d{2}[A-Z][0-9]{4,5}$'),re.compile(r'^\d{2}[A-Z][0-9]{3}\.[0-9]{2}$')]
+VALID_MOTORCYCLE_PATTERNS=[re.compile(r'^\d{2}[A-Z][0-9]{5,6}$'),re.compile(r'^\d{2}[A-Z][0-9]{2,3}\d{3}$')]
+# Recognised plates are cached by crop content; low-confidence reads are never cached
+CACHE_SIZE=512
+CACHE_MIN_CONFIDENCE=0.5
+# Shorter strings are compared in pure Python, numpy setup costs more than it saves
+SIMILARITY_NUMPY_MIN_LENGTH=32
+# Deletes every non-alphanumeric ASCII character; plates are ASCII
+NON_ALNUM_TABLE=str.maketrans('','',''.join(chr(i) for i in range(128) if not chr(i).isalnum()))
+def clean_plate_text(text):
+    return text.upper().translate(NON_ALNUM_TABLE)
 class OCRReader:
-    def __init__(self,lang='en',use_angle_cls=True,det=True,rec=True):
+    def __init__(self,lang='en',use_angle_cls=True,det=True,rec=True,cpu_threads=None):
         try:
-            self.ocr=PaddleOCR(use_angle_cls=use_angle_cls,lang=lang,det=det,rec=rec,use_gpu=False)
+            # PaddleOCR defaults to 10 CPU threads; callers on small boards should pass their core count
+            options={'cpu_threads':cpu_threads} if cpu_threads else {}
+            self.ocr=PaddleOCR(use_angle_cls=use_angle_cls,lang=lang,det=det,rec=rec,use_gpu=False,**options)
             logger.info("PaddleOCR initialized successfully (CPU mode)")
+            self._cache=OrderedDict()
         except Exception as e:
             logger.error(f"Failed to initialize PaddleOCR: {str(e)}")
             raise
@@ -16,70 +34,84 @@ class OCRReader:
             height,width=gray.shape[:2]
             target_height=min(height*2,400)
             scale=target_height/height
-            resized=cv2.resize(gray,None,fx=scale,fy=scale,interpolation=cv2.INTER_CUBIC)
-            binary=cv2.adaptiveThreshold(resized,255,cv2.ADAPTIVE_THRESH_GAUSSIAN_C,cv2.THRESH_BINARY_INV,11,2)
-            kernel=np.ones((1,1),np.uint8)
-            denoised=cv2.morphologyEx(binary,cv2.MORPH_OPEN,kernel)
-            denoised=cv2.bitwise_not(denoised)
-            return denoised
+            if scale==1:
+                resized=gray
+            else:
+                # INTER_AREA is cheaper and cleaner when shrinking tall crops
+                interpolation=cv2.INTER_CUBIC if scale>1 else cv2.INTER_AREA
+                resized=cv2.resize(gray,None,fx=scale,fy=scale,interpolation=interpolation)
+            # Dark text on white, same as thresholding inverted and flipping back
+            return cv2.adaptiveThreshold(resized,255,cv2.ADAPTIVE_THRESH_GAUSSIAN_C,cv2.THRESH_BINARY,11,2)
         except Exception as e:
             logger.error(f"Error in preprocessing: {str(e)}")
             return image
     def read_text(self,image):
+        # Repeated frames of a stationary vehicle skip PaddleOCR entirely
+        key=self._cache_key(image)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            logger.info(f"OCR cache hit: {self._cache[key]}")
+            return self._cache[key]
+        text,conf=self._recognize(image)
+        if text and conf>=CACHE_MIN_CONFIDENCE:
+            self._cache[key]=text
+            if len(self._cache)>CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return text
+    def _cache_key(self,image):
+        digest=hashlib.blake2b(str(image.shape).encode(),digest_size=16)
+        digest.update(np.ascontiguousarray(image))
+        return digest.digest()
+    def _recognize(self,image):
+        # Returns (text,confidence) for the plate, (None,0) when nothing is read
         try:
             preprocessed=self.preprocess_image(image)
-            results1=self.ocr.ocr(image,cls=True)
-            results2=self.ocr.ocr(preprocessed,cls=True)
-            all_results=[]
-            if results1 and len(results1)>0 and results1[0]:
-                all_results.extend(results1[0])
-            if results2 and len(results2)>0 and results2[0]:
-                all_results.extend(results2[0])
+            all_results=self._run_ocr(preprocessed)
+            if not all_results or max(res[1][1] for res in all_results)<FALLBACK_CONFIDENCE:
+                logger.info("Low OCR confidence on preprocessed plate, retrying on original image")
+                all_results.extend(self._run_ocr(image))
             if not all_results:
                 logger.warning("No text detected in license plate")
-                return None
-            vertical_results=[]
-            for res in all_results:
-                box=res[0]
+                return None,0
+            # Single pass: two topmost line centres, best result per 10px line group
+            # (topmost on equal confidence), best result overall and best
+            # high-confidence complete plate
+            top_y=second_y=float('inf')
+            line_groups={}
+            best_text=None
+            best_conf=-1
+            best_plate=None
+            best_plate_conf=0.8
+            for box,(text,conf) in all_results:
                 y_center=(box[0][1]+box[2][1])/2
-                vertical_results.append((y_center,res[1][0],res[1][1]))
-            vertical_results.sort(key=lambda x:x[0])
-            if len(vertical_results)>1 and abs(vertical_results[0][0]-vertical_results[1][0])>10:
+                if y_center<top_y:
+                    top_y,second_y=y_center,top_y
+                elif y_center<second_y:
+                    second_y=y_center
+                y_group=round(y_center/10)
+                group=line_groups.get(y_group)
+                if group is None or conf>group[1] or (conf==group[1] and y_center<group[2]):
+                    line_groups[y_group]=(text,conf,y_center)
+                if conf>best_conf:
+                    best_text,best_conf=text,conf
+                cleaned=clean_plate_text(text)
+                if conf>best_plate_conf and PLATE_PATTERN.match(cleaned):
+                    best_plate,best_plate_conf=cleaned,conf
+            if len(all_results)>1 and second_y-top_y>10:
                 logger.info("Detected multi-line plate (motorcycle)")
-                line_groups={}
-                for y_pos,text,conf in vertical_results:
-                    y_group=round(y_pos/10)*10
-                    if y_group not in line_groups:
-                        line_groups[y_group]=[]
-                    line_groups[y_group].append((text,conf))
-                lines_with_conf=[]
-                for y_group,texts in sorted(line_groups.items()):
-                    texts.sort(key=lambda x:x[1],reverse=True)
-                    best_text=texts[0][0]
-                    best_conf=texts[0][1]
-                    cleaned_text=''.join(ch for ch in best_text if ch.isalnum()).upper()
-                    lines_with_conf.append((cleaned_text,best_conf))
-                combined_text=''.join(text for text,_ in lines_with_conf)
+                combined_text=''.join(clean_plate_text(text) for _,(text,_,_) in sorted(line_groups.items()))
                 if self._is_valid_motorcycle_plate(combined_text):
                     logger.info(f"Valid motorcycle plate recognized: {combined_text}")
-                    return combined_text
+                    return combined_text,min(conf for _,conf,_ in line_groups.values())
                 logger.info(f"Multi-line texts detected but not valid format: {combined_text}")
-            all_results.sort(key=lambda x:x[1][1],reverse=True)
-            text_with_conf=[(res[1][0],res[1][1]) for res in all_results]
-            plate_pattern=re.compile(r'^(\d{2}[A-Za-z][0-9]{4,5})$')
-            for text,conf in text_with_conf:
-                cleaned=''.join(ch for ch in text if ch.isalnum()).upper()
-                if plate_pattern.match(cleaned) and conf>0.8:
-                    logger.info(f"Found high-confidence complete plate: {cleaned}")
-                    return cleaned
-            all_texts=[]
-            for text,_ in text_with_conf:
-                cleaned_text=''.join(ch for ch in text if ch.isalnum()).upper()
-                all_texts.append(cleaned_text)
+            if best_plate:
+                logger.info(f"Found high-confidence complete plate: {best_plate}")
+                return best_plate,best_plate_conf
             final_text=""
-            if all_texts:
-                candidate=all_texts[0]
-                if len(candidate)>=156:
+            if best_text is not None:
+                candidate=clean_plate_text(best_text)
+                # Two concatenated reads of the same 7-8 character plate
+                if len(candidate)>=14 and len(candidate)%2==0:
                     half_length=len(candidate)//2
                     first_half=candidate[:half_length]
                     second_half=candidate[half_length:]
@@ -94,26 +126,36 @@ class OCRReader:
                 else:
                     final_text=candidate
             logger.info(f"Extracted text: {final_text}")
-            return final_text
+            return final_text,best_conf
         except Exception as e:
             logger.error(f"Error in OCR processing: {str(e)}")
-            return None
+            return None,0
+    def _run_ocr(self,image):
+        results=self.ocr.ocr(image,cls=True)
+        if results and len(results)>0 and results[0]:
+            return list(results[0])
+        return []
     def _similarity_score(self,str1,str2):
         if not str1 or not str2:
             return 0
-        matches=sum(c1==c2 for c1,c2 in zip(str1,str2))
+        length=min(len(str1),len(str2))
+        if length<SIMILARITY_NUMPY_MIN_LENGTH:
+            matches=sum(c1==c2 for c1,c2 in zip(str1,str2))
+        else:
+            # Compare code points in C; UTF-32 keeps one element per character
+            chars1=np.frombuffer(str1[:length].encode('utf-32-le'),np.uint32)
+            chars2=np.frombuffer(str2[:length].encode('utf-32-le'),np.uint32)
+            matches=int(np.count_nonzero(chars1==chars2))
         return matches/max(len(str1),len(str2))
     def _is_valid_plate(self,text):
-        patterns=[r'^\d{2}[A-Z][0-9]{4,5}$',r'^\d{2}[A-Z][0-9]{3}\.[0-9]{2}$']
-        cleaned=''.join(ch for ch in text if ch.isalnum()).upper()
-        for pattern in patterns:
-            if re.match(pattern,cleaned):
+        cleaned=clean_plate_text(text)
+        for pattern in VALID_PLATE_PATTERNS:
+            if pattern.match(cleaned):
                 return True
         return False
     def _is_valid_motorcycle_plate(self,text):
-        patterns=[r'^\d{2}[A-Z][0-9]{5,6}$',r'^\d{2}[A-Z][0-9]{2,3}\d{3}$']
-        cleaned=''.join(ch for ch in text if ch.isalnum()).upper()
-        for pattern in patterns:
-            if re.match(pattern,cleaned):
+        cleaned=clean_plate_text(text)
+        for pattern in VALID_MOTORCYCLE_PATTERNS:
+            if pattern.match(cleaned):
                 return True
         return False
\ No newline at end of file
@@ -3,6 +3,9 @@ import re
 
 logger = logging.getLogger(__name__)
 
+# Matches everything that is not an uppercase letter or digit
+NON_ALNUM_PATTERN = re.compile(r'[^A-Z0-9]')
+
 class PlateParser:
     """
     Class for parsing license plate text according to the format rules
@@ -23,22 +26,10 @@ class PlateParser:
         self.localID_pattern = re.compile(r'^\d{2}')
         self.modelID_pattern = re.compile(r'[A-Za-z0-9]{1,2}')
         self.mainID_pattern = re.compile(r'\d{4,5}$')
-    
-    def clean_text(self, text):
-        """
-        Clean the OCR output for better parsing
         
-        Args:
-            text: Raw OCR output
-            
-        Returns:
-            Cleaned text
-        """
-        if not text:
-            return ""
-            
-        # Remove common OCR errors and normalize characters
-        replacements = {
+        # Common OCR errors and characters to drop, applied in one
+        # str.translate pass
+        self.replacements = str.maketrans({
             'O': '0',  # Letter O to zero
             'I': '1',  # Letter I to one
             'Z': '2',  # Sometimes Z is mistaken for 2
@@ -51,15 +42,26 @@ class PlateParser:
             '-': '',   # Remove hyphens
             '.': '',   # Remove periods
             ',': '',   # Remove commas
-        }
+        })
+    
+    def clean_text(self, text):
+        """
+        Clean the OCR output for better parsing
         
+        Args:
+            text: Raw OCR output
+            
+        Returns:
+            Cleaned text
+        """
+        if not text:
+            return ""
+            
         # Apply replacements
-        cleaned = text.upper()
-        for old, new in replacements.items():
-            cleaned = cleaned.replace(old, new)
+        cleaned = text.upper().translate(self.replacements)
         
         # Remove non-alphanumeric characters
-        cleaned = re.sub(r'[^A-Z0-9]', '', cleaned)
+        cleaned = NON_ALNUM_PATTERN.sub('', cleaned)
         
         return cleaned
     
@@ -9,17 +9,29 @@ Manages:
 - Parking lot capacity tracking
 """
 
+import os
+
+# The UART receiver gets a core of its own; the inference process shares the rest
+RECEIVER_CORES = {3}
+INFERENCE_CORES = {0, 1, 2}
+
+# Cap OpenMP/BLAS threads before numpy, torch and Paddle start their pools,
+# one per inference core, so the detector and OCR don't oversubscribe them
+os.environ.setdefault("OMP_NUM_THREADS", str(len(INFERENCE_CORES)))
+
 import serial
 import cv2
 import sqlite3
+import queue
+import selectors
+import signal
 import threading
 import time
 import logging
-import os
+import multiprocessing
+from collections import deque
+from multiprocessing import shared_memory
 import numpy as np
-from datetime import datetime
-from detector import LicensePlateDetector
-from ocr_reader import OCRReader
 
 # Configure logging
 logging.basicConfig(
@@ -39,16 +51,91 @@ EVENT_CAR_DETECT = 0x03
 EVENT_LP_STATUS = 0x04
 EVENT_PARK_FULL = 0x05
 
+RESPONSE_TIMEOUT = 0.5      # Seconds to wait for each OK/ERR from STM32
+MAX_RESPONSE_LENGTH = 16    # Longer text without a newline is treated as noise
+ARRIVAL_QUEUE_SIZE = 4      # Pending arrivals before new detections are dropped
+ARRIVAL_COOLDOWN = 1.0      # Seconds after an arrival during which re-triggers are ignored
+
+def _generate_crc8_table():
+    """Generate the byte-at-a-time lookup table for CRC8 with polynomial 0x07"""
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            if crc & 0x80:
+                crc = ((crc << 1) ^ 0x07) & 0xFF
+            else:
+                crc = (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+CRC8_TABLE = _generate_crc8_table()
+
 # Global variables
 car_detected = False
 lot_capacity = 0
 MAX_CAPACITY = 100
 lock = threading.Lock()
 db_path = "car_park.db"
+db_conn = None  # Shared connection opened by init_database()
+db_lock = threading.Lock()
+
+# Recent registration lookups as {plate: (registered, expiry time)}. The web
+# interface edits plates from another process, so entries expire quickly
+# instead of living until invalidated.
+PLATE_CACHE_TTL = 10  # seconds
+PLATE_CACHE_SIZE = 512
+plate_cache = {}
+
+# Movement log entries waiting to be written as (plate, action, timestamp)
+LOG_FLUSH_SIZE = 8
+LOG_FLUSH_INTERVAL = 2  # seconds
+pending_logs = []
+
+# Debug images cost a full-frame copy per arrival, frames held in memory and WebP
+# encodes plus SD card writes after failed reads, so they are opt-in
+DEBUG_IMAGES = os.environ.get('DEBUG_IMAGES', 'false').lower() == 'true'
+DEBUG_DIR = "debug_images"
+# WebP encodes faster and smaller than JPEG, sparing CPU and SD card writes
+DEBUG_IMAGE_PARAMS = [cv2.IMWRITE_WEBP_QUALITY, 60]
+# Recent frames kept in memory as (timestamp, frame), written out only when
+# recognition fails
+DEBUG_FRAME_COUNT = 8
+debug_frames = deque(maxlen=DEBUG_FRAME_COUNT)
+# Frame size the detector runs on; plates are still cropped from the full frame
+DETECT_FRAME_SIZE = (640, 360)
 
-# Initialize license plate detector and OCR reader
-detector = LicensePlateDetector(model_path="best.pt")
-ocr = OCRReader()
+# Threads used by OpenCV (resize/colour conversion) and by PaddleOCR inference
+CV_THREADS = 2
+OCR_THREADS = int(os.environ["OMP_NUM_THREADS"])
+cv2.setNumThreads(CV_THREADS)
+
+# Seconds to wait for the inference process to load its models and to read a plate
+INFERENCE_START_TIMEOUT = 120
+INFERENCE_TIMEOUT = 10
+
+# Set by the signal handlers to shut the system down
+stop_event = threading.Event()
+
+def pin_to_cores(cores):
+    """Pin the calling thread to the given CPU cores where supported
+    
+    Args:
+        cores (set): CPU core numbers
+    
+    Returns:
+        bool: True if the thread was pinned
+    """
+    # sched_setaffinity(0) applies to the calling thread on Linux only
+    if not hasattr(os, "sched_setaffinity") or not cores <= os.sched_getaffinity(0):
+        return False
+    try:
+        os.sched_setaffinity(0, cores)
+        logging.debug(f"Pinned thread {threading.get_native_id()} to cores {sorted(cores)}")
+        return True
+    except OSError as e:
+        logging.warning(f"Could not pin thread to cores {sorted(cores)}: {str(e)}")
+        return False
 
 class UARTHandler:
     """Handles UART communication with STM32"""
@@ -60,6 +147,14 @@ class UARTHandler:
         self.ser = None
         self.running = False
         self.buffer = bytearray()
+        self.write_lock = threading.Lock()
+        
+        # OK/ERR lines from STM32, filled by the receiver thread
+        self.responses = queue.Queue()
+        
+        # Arrivals are handled on the worker thread so the receiver keeps draining UART
+        self.arrivals = queue.Queue(maxsize=ARRIVAL_QUEUE_SIZE)
+        self._last_arrival_ts = None  # time.monotonic() when the last arrival was handled
     
     def connect(self):
         """Connect to UART port"""
@@ -72,6 +167,13 @@ class UARTHandler:
                 stopbits=serial.STOPBITS_ONE,
                 timeout=0.1
             )
+            
+            # Skip the USB-serial latency timer; not all transports support it
+            try:
+                self.ser.set_low_latency_mode(True)
+            except Exception as e:
+                logging.debug(f"Low latency mode not available: {str(e)}")
+            
             self.running = True
             logging.info(f"Connected to {self.port} at {self.baud_rate} baud")
             return True
@@ -86,20 +188,17 @@ class UARTHandler:
             self.ser.close()
             logging.info(f"Disconnected from {self.port}")
     
-    def send_packet(self, event_id, data):
-        """Send a packet to STM32
+    @staticmethod
+    def build_packet(event_id, data):
+        """Build a packet for STM32
         
         Args:
             event_id (int): Event ID (0x01-0x05)
-            data (bytes or bytearray): Data to send
+            data (bytes, bytearray or str): Data to send
         
         Returns:
-            bool: True if packet was sent successfully
+            bytearray: Complete packet including CRC8
         """
-        if not self.ser or not self.ser.is_open:
-            logging.error("Cannot send packet: UART not connected")
-            return False
-        
         # Construct packet
         packet = bytearray([PACKET_START])
         packet.append(len(data) + 1)  # Length (event ID + data)
@@ -112,24 +211,90 @@ class UARTHandler:
             packet.extend(data.encode('utf-8'))
         
         # Calculate CRC8
-        crc = self.calculate_crc8(packet[2:])
+        crc = UARTHandler.calculate_crc8(packet[2:])
         packet.append(crc)
+        return packet
+    
+    def read_response(self):
+        """Wait for one OK/ERR response line from STM32
+        
+        Responses are read off the port by the receiver thread.
         
+        Returns:
+            bool: True if STM32 answered OK
+        """
         try:
-            self.ser.write(packet)
-            logging.debug(f"Sent packet: {packet.hex()}")
+            response = self.responses.get(timeout=RESPONSE_TIMEOUT)
+        except queue.Empty:
+            logging.warning("No response from STM32")
+            return False
+        
+        if response == "OK":
+            logging.debug("Received OK response")
+            return True
+        elif response == "ERR":
+            logging.warning("Received ERR response")
+            return False
+        else:
+            logging.warning(f"Unknown response: {response}")
+            return False
+    
+    def send_packet(self, event_id, data):
+        """Send a packet to STM32
+        
+        Args:
+            event_id (int): Event ID (0x01-0x05)
+            data (bytes or bytearray): Data to send
+        
+        Returns:
+            bool: True if packet was sent successfully
+        """
+        return self.send_packets([(event_id, data)])
+    
+    def send_packets(self, events):
+        """Send several packets to STM32 in a single write
+        
+        STM32 still answers each packet separately; the answers are read
+        after everything is sent, so the exchange costs one round trip
+        instead of one per packet.
+        
+        Args:
+            events (list): (event_id, data) tuples, sent in order
+        
+        Returns:
+            bool: True if every packet was acknowledged with OK
+        """
+        buffer = bytearray()
+        for event_id, data in events:
+            buffer.extend(self.build_packet(event_id, data))
+        return self.send_prebuilt(buffer, len(events))
+    
+    def send_prebuilt(self, packets, count=1):
+        """Send already built packets to STM32 in a single write
+        
+        Args:
+            packets (bytes): One or more complete packets, concatenated
+            count (int): Number of packets, i.e. responses to wait for
+        
+        Returns:
+            bool: True if every packet was acknowledged with OK
+        """
+        if not self.ser or not self.ser.is_open:
+            logging.error("Cannot send packet: UART not connected")
+            return False
+        
+        # Drop late responses to earlier packets so they aren't taken for ours
+        while not self.responses.empty():
+            self.responses.get_nowait()
+        
+        try:
+            with self.write_lock:
+                self.ser.write(packets)
+            logging.debug(f"Sent {count} packet(s): {packets.hex()}")
             
-            # Wait for response
-            response = self.ser.readline().decode('utf-8').strip()
-            if response == "OK":
-                logging.debug("Received OK response")
-                return True
-            elif response == "ERR":
-                logging.warning("Received ERR response")
-                return False
-            else:
-                logging.warning(f"Unknown response: {response}")
-                return False
+            # Wait for one response per packet
+            results = [self.read_response() for _ in range(count)]
+            return all(results)
         except Exception as e:
             logging.error(f"Error sending packet: {str(e)}")
             return False
@@ -137,9 +302,9 @@ class UARTHandler:
     def receiver_thread(self):
         """Thread that receives and processes incoming packets"""
         
-        packet_state = 0  # 0: waiting for start, 1: got length, 2: collecting data
-        packet_length = 0
-        packet_data = bytearray()
+        # Keep the receiver on a warm core, away from the inference process
+        pin_to_cores(RECEIVER_CORES)
+        selector = None
         
         while self.running:
             if not self.ser or not self.ser.is_open:
@@ -147,35 +312,67 @@ class UARTHandler:
                 continue
             
             try:
-                # Read available data
-                if self.ser.in_waiting > 0:
-                    data = self.ser.read(self.ser.in_waiting)
-                    
-                    for byte in data:
-                        # State machine to parse incoming packets
-                        if packet_state == 0:  # Waiting for start byte
-                            if byte == PACKET_START:
-                                packet_data = bytearray([PACKET_START])
-                                packet_state = 1
-                        
-                        elif packet_state == 1:  # Got start, get length
-                            packet_length = byte
-                            packet_data.append(byte)
-                            packet_state = 2
-                        
-                        elif packet_state == 2:  # Collecting data
-                            packet_data.append(byte)
-                            
-                            # Check if we have a complete packet
-                            if len(packet_data) >= packet_length + 3:  # Start + Length + Data + CRC
-                                self.process_packet(packet_data)
-                                packet_state = 0  # Reset state machine
-                    
-                time.sleep(0.01)  # Small delay to prevent CPU hogging
+                # Sleep in the kernel until the port is readable
+                if selector is None:
+                    selector = selectors.DefaultSelector()
+                    selector.register(self.ser.fileno(), selectors.EVENT_READ)
+                if not selector.select(timeout=1.0):
+                    continue
+                
+                # Drain everything that has arrived
+                data = self.ser.read(self.ser.in_waiting or 1)
+                if data:
+                    self.buffer.extend(data)
+                    self.extract_packets()
             
             except Exception as e:
                 logging.error(f"Error in receiver thread: {str(e)}")
+                if selector is not None:
+                    selector.close()
+                    selector = None
                 time.sleep(1)
+        
+        if selector is not None:
+            selector.close()
+    
+    def extract_packets(self):
+        """Slice every complete packet and response line out of the receive buffer
+        
+        Text lines before a start byte are STM32's OK/ERR responses; other
+        bytes before a start byte are discarded. An incomplete packet or line
+        stays buffered until the rest of it arrives.
+        """
+        while True:
+            start = self.buffer.find(PACKET_START)
+            
+            # Response lines come between packets
+            newline = self.buffer.find(b"\n", 0, start if start >= 0 else len(self.buffer))
+            if newline >= 0:
+                line = bytes(self.buffer[:newline]).strip().decode('utf-8', 'replace')
+                del self.buffer[:newline + 1]
+                if line:
+                    self.responses.put(line)
+                continue
+            
+            if start < 0:
+                # Keep what may be the start of a response line
+                if len(self.buffer) > MAX_RESPONSE_LENGTH:
+                    self.buffer.clear()
+                return
+            if start > 0:
+                del self.buffer[:start]
+            
+            # Need the length byte to know where the packet ends
+            if len(self.buffer) < 2:
+                return
+            
+            total = self.buffer[1] + 3  # Start + Length + Data + CRC
+            if len(self.buffer) < total:
+                return
+            
+            packet = bytes(self.buffer[:total])
+            del self.buffer[:total]
+            self.process_packet(packet)
     
     def process_packet(self, packet):
         """Process a complete packet from STM32"""
@@ -213,7 +410,10 @@ class UARTHandler:
                 car_detected = is_detected
                 if car_detected:
                     logging.info("Car detected")
-                    self.handle_car_arrival()
+                    try:
+                        self.arrivals.put_nowait("arrival")
+                    except queue.Full:
+                        logging.warning("Arrival queue full, dropping car detection")
                 else:
                     logging.info("No car")
         else:
@@ -222,17 +422,40 @@ class UARTHandler:
     def send_response(self, response):
         """Send a simple text response (OK/ERR)"""
         if self.ser and self.ser.is_open:
-            self.ser.write(f"{response}\n".encode())
+            with self.write_lock:
+                self.ser.write(f"{response}\n".encode())
+    
+    def worker_thread(self):
+        """Thread that handles queued car arrivals"""
+        while self.running:
+            try:
+                self.arrivals.get(timeout=1)
+            except queue.Empty:
+                continue
+            
+            # A chattering detection line re-triggers right after a car was handled
+            if (self._last_arrival_ts is not None
+                    and time.monotonic() - self._last_arrival_ts < ARRIVAL_COOLDOWN):
+                logging.info("Ignoring car detection during arrival cooldown")
+                continue
+            
+            try:
+                self.handle_car_arrival()
+            except Exception as e:
+                logging.error(f"Error handling car arrival: {str(e)}")
+            finally:
+                self._last_arrival_ts = time.monotonic()
     
     def handle_car_arrival(self):
         """Handle a car arriving at the barrier"""
         
         # Check if lot is full
         global lot_capacity, MAX_CAPACITY
-        if lot_capacity >= MAX_CAPACITY:
+        with lock:
+            is_full = lot_capacity >= MAX_CAPACITY
+        if is_full:
             logging.info("Parking lot is full")
-            self.send_packet(EVENT_PARK_FULL, bytearray([1]))
-            self.send_packet(EVENT_DISPLAY, "Lot Full")
+            self.send_prebuilt(PKTS_LOT_FULL, 2)
             return
         
         # Capture license plate
@@ -247,109 +470,434 @@ class UARTHandler:
                 # Increment lot capacity
                 with lock:
                     lot_capacity += 1
-                    if lot_capacity >= MAX_CAPACITY:
-                        self.send_packet(EVENT_PARK_FULL, bytearray([1]))
+                    now_full = lot_capacity >= MAX_CAPACITY
                 
-                # Send commands to STM32
-                self.send_packet(EVENT_LP_STATUS, bytearray([1]))  # Registered
-                self.send_packet(EVENT_SERVO, bytearray([90]))     # Open barrier
-                self.send_packet(EVENT_DISPLAY, f"Welcome")
+                # Send commands to STM32: registered, open barrier, welcome
+                if now_full:
+                    self.send_prebuilt(PKTS_ENTRY_FULL, 4)
+                else:
+                    self.send_prebuilt(PKTS_ENTRY, 3)
                 
                 # Log entry
                 log_vehicle_movement(plate_number, "entry")
             else:
                 logging.info(f"Plate {plate_number} is not registered")
-                self.send_packet(EVENT_LP_STATUS, bytearray([0]))  # Not registered
-                self.send_packet(EVENT_DISPLAY, "Invalid Plate")
+                self.send_prebuilt(PKTS_INVALID, 2)
         else:
             logging.warning("Failed to detect license plate")
-            self.send_packet(EVENT_DISPLAY, "No Plate Found")
+            self.send_prebuilt(PKT_DISPLAY_NO_PLATE)
     
     @staticmethod
-    def calculate_crc8(data):
-        """Calculate CRC8 with polynomial 0x07"""
+    def calculate_crc8(data, _table=CRC8_TABLE):
+        """Calculate CRC8 with polynomial 0x07 using a lookup table"""
+        # For packet-sized inputs this plain loop beats functools.reduce
+        # (a Python call per byte) and memoryview slicing
         crc = 0
         for byte in data:
-            crc ^= byte
-            for _ in range(8):
-                if crc & 0x80:
-                    crc = (crc << 1) ^ 0x07
-                else:
-                    crc = crc << 1
-                crc &= 0xFF  # Keep only 8 bits
+            crc = _table[crc ^ byte]
         return crc
 
-def capture_license_plate():
-    """Capture and recognize license plate using dedicated detector and OCR
+# Packets with fixed payloads, built once instead of on every arrival
+PKT_LP_OK = bytes(UARTHandler.build_packet(EVENT_LP_STATUS, b'\x01'))
+PKT_LP_BAD = bytes(UARTHandler.build_packet(EVENT_LP_STATUS, b'\x00'))
+PKT_SERVO_OPEN = bytes(UARTHandler.build_packet(EVENT_SERVO, bytes([90])))
+PKT_PARK_FULL_1 = bytes(UARTHandler.build_packet(EVENT_PARK_FULL, b'\x01'))
+PKT_DISPLAY_WELCOME = bytes(UARTHandler.build_packet(EVENT_DISPLAY, "Welcome"))
+PKT_DISPLAY_INVALID = bytes(UARTHandler.build_packet(EVENT_DISPLAY, "Invalid Plate"))
+PKT_DISPLAY_FULL = bytes(UARTHandler.build_packet(EVENT_DISPLAY, "Lot Full"))
+PKT_DISPLAY_NO_PLATE = bytes(UARTHandler.build_packet(EVENT_DISPLAY, "No Plate Found"))
+
+# Packet sequences sent together for each arrival outcome
+PKTS_LOT_FULL = PKT_PARK_FULL_1 + PKT_DISPLAY_FULL
+PKTS_ENTRY = PKT_LP_OK + PKT_SERVO_OPEN + PKT_DISPLAY_WELCOME
+PKTS_ENTRY_FULL = PKT_PARK_FULL_1 + PKTS_ENTRY
+PKTS_INVALID = PKT_LP_BAD + PKT_DISPLAY_INVALID
+
+class CameraGrabber:
+    """Keeps the webcam open and grabbing so the newest frame is always ready"""
+    
+    def __init__(self, index=0, width=1280, height=720):
+        """Initialize camera settings"""
+        self.index = index
+        self.width = width
+        self.height = height
+        self.cap = None
+        self.frame = None
+        self.running = False
+        self.lock = threading.Lock()
+    
+    def start(self):
+        """Open the camera and start the grabber thread
+        
+        Returns:
+            bool: True if the camera was opened
+        """
+        self.cap = cv2.VideoCapture(self.index, cv2.CAP_V4L2)
+        if not self.cap.isOpened():
+            logging.error("Failed to open webcam")
+            return False
+        
+        # MJPG negotiates faster on USB webcams; a one-frame buffer keeps frames fresh
+        self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        
+        # Frames are decoded into one reused buffer, sized to what the camera actually delivers
+        width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or self.width
+        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or self.height
+        self.frame = np.empty((height, width, 3), np.uint8)
+        
+        self.running = True
+        thread = threading.Thread(target=self.grabber_thread)
+        thread.daemon = True
+        thread.start()
+        
+        logging.info(f"Camera {self.index} started at {width}x{height}")
+        return True
+    
+    def stop(self):
+        """Stop grabbing and release the camera"""
+        self.running = False
+        with self.lock:
+            if self.cap:
+                self.cap.release()
+    
+    def grabber_thread(self):
+        """Thread that keeps grabbing frames so exposure stays settled"""
+        while self.running:
+            with self.lock:
+                grabbed = self.running and self.cap.grab()
+            if not grabbed and self.running:
+                logging.warning("Failed to grab frame from webcam")
+                time.sleep(0.1)
+    
+    def get_latest(self, out=None):
+        """Decode the most recently grabbed frame
+        
+        The frame lives in a buffer that is reused, so it is only valid until
+        the next call; copy it to keep it longer.
+        
+        Args:
+            out (numpy.ndarray): Buffer to decode into instead of the camera's own
+        
+        Returns:
+            numpy.ndarray or None: Latest frame or None if unavailable
+        """
+        with self.lock:
+            if not self.running:
+                return None
+            ret, frame = self.cap.retrieve(self.frame if out is None else out)
+            if out is None:
+                self.frame = frame
+        return frame if ret else None
+
+camera = CameraGrabber()
+
+def inference_worker(shm_name, shape, conn):
+    """Run plate detection and OCR on frames written to shared memory
+    
+    Runs in its own process so model pre/post-processing doesn't hold the
+    controller's GIL while the UART receiver is servicing the STM32. Each
+    request is a sequence number sent over conn once the frame is in shared
+    memory; the reply (sequence number, plate text) is only sent after the
+    frame is no longer in use, so the controller may then overwrite it.
+    """
+    # The controller stops this process itself, so leave Ctrl+C to it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    ocr_threads = OCR_THREADS
+    if pin_to_cores(INFERENCE_CORES):
+        # No more OCR threads than cores the process may run on
+        ocr_threads = min(ocr_threads, len(INFERENCE_CORES))
+    
+    # torch, ultralytics and Paddle are only imported here, so the controller
+    # process doesn't carry a second copy of the ML stack
+    from detector import LicensePlateDetector, default_model_path
+    from ocr_reader import OCRReader
+    
+    # Load the models once up front so the first car isn't kept waiting.
+    # On the Pi, use the NCNN export (python3 export_model.py --format ncnn)
+    # with DETECTOR_MODEL=best_ncnn_model
+    detector = LicensePlateDetector(
+        model_path=default_model_path(),
+        imgsz=int(os.environ.get("DETECTOR_IMGSZ", 640))
+    )
+    ocr = OCRReader(cpu_threads=ocr_threads)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frame = np.ndarray(shape, np.uint8, buffer=shm.buf)
+    conn.send("ready")
+    
+    try:
+        while True:
+            try:
+                seq = conn.recv()
+            except EOFError:
+                break
+            if seq is None:
+                break
+            
+            try:
+                plate_text = recognize_plate(frame, detector, ocr)
+            except Exception as e:
+                logging.error(f"Error recognizing license plate: {str(e)}")
+                plate_text = None
+            conn.send((seq, plate_text))
+    finally:
+        del frame
+        shm.close()
+
+def recognize_plate(frame, detector, ocr):
+    """Detect and read the license plate in a full-resolution frame
     
     Returns:
         str or None: Recognized plate number or None if failed
     """
-    try:
-        # Open camera (adjust index if needed)
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
-            logging.error("Failed to open webcam")
+    # Nanosecond timestamps keep debug file names unique within a second
+    timestamp = time.time_ns()
+    
+    # Detect on a downscaled frame, crop the plate from the full-resolution one
+    small_frame = cv2.resize(frame, DETECT_FRAME_SIZE, interpolation=cv2.INTER_AREA)
+    cropped_plate = detector.detect_plate(small_frame, source=frame)
+    
+    if cropped_plate is not None:
+        # Save detected plate image
+        if DEBUG_IMAGES:
+            cv2.imwrite(f"{DEBUG_DIR}/plate_{timestamp}.webp", cropped_plate, DEBUG_IMAGE_PARAMS)
+        
+        # Use OCR to read the plate text
+        plate_text = ocr.read_text(cropped_plate)
+        
+        if plate_text:
+            # Clean up the detected text (remove spaces, convert to uppercase)
+            plate_text = plate_text.upper().replace(' ', '')
+            logging.info(f"Detected license plate text: {plate_text}")
+            return plate_text
+        else:
+            logging.warning("OCR could not read text from the detected plate")
             return None
+    else:
+        logging.warning("No license plate detected in image")
+        return None
+
+class InferenceProcess:
+    """Owns the worker process that keeps the detector and OCR models loaded"""
+    
+    def __init__(self):
+        """Initialize inference process state"""
+        self.process = None
+        self.shape = None
+        self.shm = None
+        self.frame = None
+        self.conn = None
+        self.seq = 0
+        self.pending = None  # Sequence number of a request still being worked on
+    
+    def start(self, shape):
+        """Start the worker process and wait for its models to load
         
-        # Set camera parameters
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+        Args:
+            shape (tuple): Shape of the camera frames that will be recognized
+            
+        Returns:
+            bool: True if the worker is ready
+        """
+        # Spawn rather than fork, so the child doesn't inherit the camera and
+        # serial threads or torch's thread pool state
+        ctx = multiprocessing.get_context("spawn")
+        self.shape = shape
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+        self.frame = np.ndarray(shape, np.uint8, buffer=self.shm.buf)
+        self.conn, child_conn = ctx.Pipe()
+        self.pending = None
         
-        # Allow camera to adjust exposure
-        for _ in range(5):
-            cap.read()
-            time.sleep(0.1)
+        self.process = ctx.Process(
+            target=inference_worker,
+            args=(self.shm.name, shape, child_conn)
+        )
+        self.process.daemon = True
+        self.process.start()
+        child_conn.close()
         
-        # Capture frame
-        ret, frame = cap.read()
-        if not ret:
-            logging.error("Failed to capture frame")
-            cap.release()
-            return None
+        try:
+            if self.conn.poll(INFERENCE_START_TIMEOUT) and self.conn.recv() == "ready":
+                logging.info("Inference process ready")
+                return True
+        except EOFError:
+            pass
+        logging.error("Inference process failed to start")
+        self.stop()
+        return False
+    
+    def stop(self):
+        """Stop the worker process and release the shared frame buffer"""
+        if self.process is not None:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process = None
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        if self.shm is not None:
+            self.frame = None
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+    
+    def restart(self):
+        """Replace a worker process that died, e.g. after an OOM kill
+        
+        Returns:
+            bool: True if the new worker is ready
+        """
+        logging.error("Restarting inference process")
+        self.stop()
+        return self.start(self.shape)
+    
+    def acquire_frame(self):
+        """Wait until the worker is free and return the shared frame buffer
         
-        # Save original image for debugging
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        debug_dir = "debug_images"
-        os.makedirs(debug_dir, exist_ok=True)
-        cv2.imwrite(f"{debug_dir}/original_{timestamp}.jpg", frame)
+        Decoding the camera frame straight into this buffer saves copying it
+        into shared memory afterwards.
         
-        # Use license plate detector to find and crop the license plate
-        cropped_plate = detector.detect_and_crop(frame)
+        Returns:
+            numpy.ndarray or None: Buffer to fill, or None if the worker is unavailable
+        """
+        if self.process is None or not self.process.is_alive():
+            logging.error("Inference process is not running")
+            if not self.restart():
+                return None
+        
+        try:
+            # The worker may still be reading the frame of a request that timed
+            # out; its reply says it is done, so wait for that before overwriting
+            if self.pending is not None:
+                found, _ = self.wait_reply(self.pending, INFERENCE_TIMEOUT)
+                if not found:
+                    logging.error("Inference process still busy with a previous frame")
+                    return None
+            return self.frame
+        except (EOFError, OSError) as e:
+            self.worker_lost(e)
+            return None
+    
+    def recognize(self, frame):
+        """Hand a frame to the worker process and wait for the plate text
         
-        if cropped_plate is not None:
-            # Save detected plate image
-            cv2.imwrite(f"{debug_dir}/plate_{timestamp}.jpg", cropped_plate)
+        Args:
+            frame (numpy.ndarray): Frame decoded into the buffer from
+                acquire_frame(); any other frame of the same shape is copied in
             
-            # Use OCR to read the plate text
-            plate_text = ocr.read_text(cropped_plate)
+        Returns:
+            str or None: Recognized plate number or None if failed
+        """
+        try:
+            if frame is not self.frame:
+                np.copyto(self.frame, frame)
             
-            # Release camera
-            cap.release()
+            self.seq += 1
+            self.pending = self.seq
+            self.conn.send(self.seq)
             
-            if plate_text:
-                # Clean up the detected text (remove spaces, convert to uppercase)
-                plate_text = plate_text.upper().replace(' ', '')
-                logging.info(f"Detected license plate text: {plate_text}")
-                return plate_text
-            else:
-                logging.warning("OCR could not read text from the detected plate")
+            found, plate_text = self.wait_reply(self.seq, INFERENCE_TIMEOUT)
+            if not found:
+                logging.error("Timed out waiting for the inference process")
                 return None
-        else:
-            logging.warning("No license plate detected in image")
-            # Save processed image
-            cv2.imwrite(f"{debug_dir}/processed_{timestamp}.jpg", frame)
-            cap.release()
+            return plate_text
+        except (EOFError, OSError) as e:
+            self.worker_lost(e)
+            return None
+    
+    def worker_lost(self, error):
+        """Make sure a worker that exited mid-request is gone
+        
+        The caller may still hold the shared frame, so the replacement is
+        started by the next acquire_frame() rather than here.
+        """
+        logging.error(f"Lost the inference process: {str(error)}")
+        self.pending = None
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+    
+    def wait_reply(self, seq, timeout):
+        """Wait for the reply to one request, dropping replies to older ones
+        
+        Args:
+            seq (int): Sequence number of the request
+            timeout (float): Seconds to wait
+            
+        Returns:
+            tuple: (True, plate text) once the reply arrived, else (False, None)
+        """
+        deadline = time.monotonic() + timeout
+        while self.conn.poll(max(0, deadline - time.monotonic())):
+            reply_seq, plate_text = self.conn.recv()
+            if reply_seq == seq:
+                self.pending = None
+                return True, plate_text
+            logging.warning(f"Dropping stale inference reply {reply_seq}")
+        return False, None
+
+inference = InferenceProcess()
+
+def capture_license_plate():
+    """Capture and recognize license plate using the inference process
+    
+    Returns:
+        str or None: Recognized plate number or None if failed
+    """
+    try:
+        # Decode the newest frame from the always-running camera straight
+        # into the inference process's shared buffer
+        buffer = inference.acquire_frame()
+        if buffer is None:
+            return None
+        frame = camera.get_latest(out=buffer)
+        if frame is None:
+            logging.error("Failed to capture frame")
             return None
+        
+        # Keep a copy of the original image for debugging; the shared buffer is reused
+        if DEBUG_IMAGES:
+            os.makedirs(DEBUG_DIR, exist_ok=True)
+            debug_frames.append((time.time_ns(), frame.copy()))
+        
+        plate_text = inference.recognize(frame)
+        if plate_text is None and DEBUG_IMAGES:
+            save_debug_frames()
+        return plate_text
             
     except Exception as e:
         logging.error(f"Error capturing license plate: {str(e)}")
         return None
 
+def save_debug_frames():
+    """Write the buffered debug frames to disk and empty the buffer"""
+    while debug_frames:
+        timestamp, frame = debug_frames.popleft()
+        cv2.imwrite(f"{DEBUG_DIR}/original_{timestamp}.webp", frame, DEBUG_IMAGE_PARAMS)
+
 def init_database():
-    """Initialize SQLite database if it doesn't exist"""
+    """Initialize SQLite database if it doesn't exist
+    
+    Also opens the connection shared by all later database calls.
+    """
+    global db_conn
     try:
-        conn = sqlite3.connect(db_path)
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        
+        # WAL keeps commits cheap and lets the web interface read concurrently
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA cache_size=-65536")  # 64 MB page cache
+        conn.execute("PRAGMA temp_store=MEMORY")
+        
         cursor = conn.cursor()
         
         # Create plates table if it doesn't exist
@@ -371,8 +919,11 @@ def init_database():
         )
         ''')
         
+        # The web interface lists the log newest first
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_log_ts ON movement_log(timestamp DESC)")
+        
         conn.commit()
-        conn.close()
+        db_conn = conn
         logging.info("Database initialized successfully")
         return True
     except Exception as e:
@@ -388,15 +939,23 @@ def check_plate_registered(plate_number):
     Returns:
         bool: True if plate is registered, False otherwise
     """
+    now = time.monotonic()
+    cached = plate_cache.get(plate_number)
+    if cached and cached[1] > now:
+        return cached[0]
+    
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        # plate_number's UNIQUE index makes this a point lookup
+        with db_lock:
+            result = db_conn.execute(
+                "SELECT 1 FROM plates WHERE plate_number = ?", (plate_number,)
+            ).fetchone()
         
-        cursor.execute("SELECT 1 FROM plates WHERE plate_number = ?", (plate_number,))
-        result = cursor.fetchone()
-        
-        conn.close()
-        return result is not None
+        registered = result is not None
+        if len(plate_cache) >= PLATE_CACHE_SIZE:
+            plate_cache.clear()
+        plate_cache[plate_number] = (registered, now + PLATE_CACHE_TTL)
+        return registered
     except Exception as e:
         logging.error(f"Error checking plate registration: {str(e)}")
         return False
@@ -404,27 +963,57 @@ def check_plate_registered(plate_number):
 def log_vehicle_movement(plate_number, action):
     """Log vehicle entry or exit
     
+    Entries are buffered and written in batches by flush_movement_log(), so
+    the barrier reply never waits on a disk sync.
+    
     Args:
         plate_number (str): License plate number
         action (str): 'entry' or 'exit'
     """
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        # Record the event time now; the row may be written a little later.
+        # Same UTC format as SQLite's CURRENT_TIMESTAMP
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+        with db_lock:
+            pending_logs.append((plate_number, action, timestamp))
+            should_flush = len(pending_logs) >= LOG_FLUSH_SIZE
         
-        cursor.execute(
-            "INSERT INTO movement_log (plate_number, action) VALUES (?, ?)",
-            (plate_number, action)
-        )
+        if should_flush:
+            flush_movement_log()
         
-        conn.commit()
-        conn.close()
         logging.info(f"Logged {action} for plate {plate_number}")
         return True
     except Exception as e:
         logging.error(f"Error logging vehicle movement: {str(e)}")
         return False
 
+def flush_movement_log():
+    """Write buffered movement log entries in one transaction
+    
+    Returns:
+        bool: True if the buffer was written (or empty)
+    """
+    try:
+        with db_lock:
+            if not pending_logs:
+                return True
+            db_conn.executemany(
+                "INSERT INTO movement_log (plate_number, action, timestamp) VALUES (?, ?, ?)",
+                pending_logs
+            )
+            db_conn.commit()
+            pending_logs.clear()
+        return True
+    except Exception as e:
+        logging.error(f"Error writing movement log: {str(e)}")
+        return False
+
+def log_flusher_thread():
+    """Thread that flushes the movement log every LOG_FLUSH_INTERVAL seconds"""
+    # Returns as soon as shutdown starts; main() does the final flush
+    while not stop_event.wait(LOG_FLUSH_INTERVAL):
+        flush_movement_log()
+
 def main():
     """Main function"""
     
@@ -433,10 +1022,23 @@ def main():
         logging.error("Failed to initialize database. Exiting.")
         return
     
+    # Start camera before any car can arrive
+    if not camera.start():
+        logging.error("Failed to start camera. Exiting.")
+        return
+    
+    # Load the models in the inference process before any car can arrive
+    if not inference.start(camera.frame.shape):
+        logging.error("Failed to start inference process. Exiting.")
+        camera.stop()
+        return
+    
     # Connect to UART
     uart = UARTHandler()
     if not uart.connect():
         logging.error("Failed to connect to UART. Exiting.")
+        inference.stop()
+        camera.stop()
         return
     
     # Start receiver thread
@@ -444,15 +1046,37 @@ def main():
     receiver_thread.daemon = True
     receiver_thread.start()
     
+    # Start movement log flusher thread
+    flusher_thread = threading.Thread(target=log_flusher_thread)
+    flusher_thread.daemon = True
+    flusher_thread.start()
+    
+    # Start arrival worker thread
+    worker_thread = threading.Thread(target=uart.worker_thread)
+    worker_thread.daemon = True
+    worker_thread.start()
+    
+    # Block until Ctrl+C or a service stop instead of waking up every second
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    
     logging.info("Smart Car Park system running")
     
     try:
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
+        stop_event.wait()
         logging.info("Shutting down...")
     finally:
+        stop_event.set()
         uart.disconnect()
+        # Let an arrival in progress finish its lookup and log entry
+        worker_thread.join(timeout=INFERENCE_TIMEOUT)
+        inference.stop()
+        camera.stop()
+        flusher_thread.join()
+        flush_movement_log()
+        # Close under the lock so no thread is still using the connection
+        with db_lock:
+            db_conn.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file